@@ -0,0 +1,151 @@
+"""
+Parsers for the old string params of particle effects.
+
+Before 1.20.5 particle params were a string in command syntax, now they
+are an object. Each particle type has a parser in PARSERS, keyed by the
+particle id without the minecraft namespace. Run
+`python -m originpy.particles` to benchmark them.
+"""
+import re
+import time
+import functools
+
+NUMBER = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)"
+ID = r"(?:[a-z0-9_.-]+:)?[a-z0-9/_.-]+"
+
+PATTERN_BLOCK_STATE = re.compile(r"(?P<block>" + ID + r")(?:\[(?P<props>[^\]]*)\])?")
+PATTERN_PROPERTY = re.compile(r"\s*(?P<property>[a-z0-9_]+)\s*=\s*(?P<value>[a-z0-9_]+)\s*")
+PATTERN_ITEM = re.compile(r"(?P<item>" + ID + r")(?P<nbt>\{.*\})?", re.DOTALL)
+
+def _numbers_pattern(*names):
+    return re.compile(r"\s+".join(f"(?P<{name}>{NUMBER})" for name in names))
+
+PATTERN_NUMBER = _numbers_pattern("value")
+PATTERN_DUST = _numbers_pattern("red", "green", "blue", "scale")
+PATTERN_DUST_TRANSITION = _numbers_pattern("from_red", "from_green", "from_blue", "scale", "to_red", "to_green", "to_blue")
+PATTERN_VIBRATION = _numbers_pattern("x", "y", "z", "delay")
+
+def _match(pattern, params, particle):
+    match = pattern.fullmatch(params.strip())
+    if match is None:
+        raise ValueError(f'Invalid params "{params}" for {particle} particle')
+    return match
+
+def parse_block_state(params):
+    match = _match(PATTERN_BLOCK_STATE, params, "block")
+    block_state = {"Name": match.group("block")}
+    props = match.group("props")
+    if props is not None and props.strip():
+        properties = {}
+        for prop in props.split(","):
+            prop_match = _match(PATTERN_PROPERTY, prop, "block")
+            # Block state properties are always strings
+            properties[prop_match.group("property")] = prop_match.group("value")
+        block_state["Properties"] = properties
+    return {"block_state": block_state}
+
+def parse_dust(params):
+    groups = _match(PATTERN_DUST, params, "dust").groupdict()
+    return {
+        "color": [float(groups["red"]), float(groups["green"]), float(groups["blue"])],
+        "scale": float(groups["scale"])
+    }
+
+def parse_dust_color_transition(params):
+    groups = _match(PATTERN_DUST_TRANSITION, params, "dust_color_transition").groupdict()
+    return {
+        "from_color": [float(groups["from_red"]), float(groups["from_green"]), float(groups["from_blue"])],
+        "to_color": [float(groups["to_red"]), float(groups["to_green"]), float(groups["to_blue"])],
+        "scale": float(groups["scale"])
+    }
+
+def parse_item(params):
+    match = _match(PATTERN_ITEM, params, "item")
+    if match.group("nbt"):
+        raise ValueError(f'Item nbt in "{params}" can\'t be converted to components')
+    return {"item": {"id": match.group("item")}}
+
+def parse_vibration(params):
+    groups = _match(PATTERN_VIBRATION, params, "vibration").groupdict()
+    return {
+        "destination": {"type": "block", "pos": [float(groups["x"]), float(groups["y"]), float(groups["z"])]},
+        "arrival_in_ticks": float(groups["delay"])
+    }
+
+def _number_parser(field_name, particle):
+    def parse(params):
+        return {field_name: float(_match(PATTERN_NUMBER, params, particle).group("value"))}
+    return parse
+
+PARSERS = {
+    "block": parse_block_state,
+    "block_marker": parse_block_state,
+    "falling_dust": parse_block_state,
+    "dust_pillar": parse_block_state,
+    "block_crumble": parse_block_state,
+    "dust": parse_dust,
+    "dust_color_transition": parse_dust_color_transition,
+    "item": parse_item,
+    "vibration": parse_vibration,
+    "dragon_breath": _number_parser("power", "dragon_breath"),
+    "sculk_charge": _number_parser("roll", "sculk_charge"),
+    "shriek": _number_parser("delay", "shriek"),
+}
+
+def normalize_particle_id(particle_id):
+    """Returns the particle id without the minecraft namespace."""
+    particle_id = particle_id.strip().lower()
+    if particle_id.startswith("minecraft:"):
+        particle_id = particle_id[len("minecraft:"):]
+    return particle_id
+
+@functools.lru_cache(maxsize=4096)
+def _parse_params(particle_id, params):
+    parser = PARSERS.get(normalize_particle_id(particle_id))
+    if parser is None:
+        return None
+    return parser(params)
+
+def _copy_json(value):
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    return value
+
+def parse_params(particle_id, params):
+    """
+    Returns the params object for the string params of a particle, or None
+    if the particle type has no string params to convert. Raises
+    ValueError if the params are malformed.
+    """
+    new_params = _parse_params(particle_id, params)
+    # The cached object is shared, never give it out
+    return _copy_json(new_params)
+
+# Params as found in packs, used by the benchmark
+BENCHMARK_SAMPLES = [
+    ("minecraft:block", "minecraft:oak_log[axis=y, lit=true]"),
+    ("falling_dust", "minecraft:sand"),
+    ("minecraft:dust", "1.0 0.5 0 1"),
+    ("dust_color_transition", "1 0 0 2 0 0 1"),
+    ("minecraft:item", "minecraft:apple"),
+    ("vibration", "1 64 -2.5 20"),
+    ("shriek", "5"),
+    ("flame", ""),
+]
+
+def benchmark(repeat=20000):
+    """Prints the time per parse, with and without the cache."""
+    for name, cached in (("uncached", False), ("cached", True)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            if not cached:
+                _parse_params.cache_clear()
+            for particle_id, params in BENCHMARK_SAMPLES:
+                parse_params(particle_id, params)
+        elapsed = time.perf_counter() - start
+        print(f"Parse: {name} {elapsed / (repeat * len(BENCHMARK_SAMPLES)) * 1e9:.0f} ns per params")
+
+if __name__ == "__main__":
+    benchmark()
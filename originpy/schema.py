@@ -0,0 +1,164 @@
+"""
+Compact version of the doc tables used by the updater.
+
+The doc tables describe every field as a dict with a list of
+{'is_array', 'type'} dicts, plus a default and a description. Here each
+field becomes a FieldSpec with __slots__ holding only what the updater
+reads: its name and its allowed types as a tuple of shared TypeSpec
+tuples, with the names interned. The doc modules are only loaded to
+build the specs and are then unloaded. Run `python -m originpy.schema`
+to compare both forms.
+"""
+import os
+import sys
+import time
+import importlib
+import subprocess
+from collections import namedtuple
+
+TypeSpec = namedtuple("TypeSpec", ["is_array", "type"])
+
+class FieldSpec:
+    __slots__ = ("name", "types")
+
+    def __init__(self, name, types):
+        self.name = name
+        self.types = types
+
+    def __repr__(self):
+        return f"FieldSpec({self.name!r}, {self.types!r})"
+
+_type_specs = {}
+
+def compile_type(typ):
+    """Returns the shared TypeSpec for a {'is_array', 'type'} dict."""
+    key = (bool(typ["is_array"]), sys.intern(typ["type"]))
+    spec = _type_specs.get(key)
+    if spec is None:
+        spec = TypeSpec(*key)
+        _type_specs[key] = spec
+    return spec
+
+def compile_field(field):
+    """Returns the FieldSpec of a field dict."""
+    return FieldSpec(sys.intern(field["name"]), tuple(compile_type(typ) for typ in field["type"]))
+
+def compile_shapes(shape_data):
+    """Returns a dict of type id to a tuple of FieldSpec."""
+    return {sys.intern(type): tuple(compile_field(field) for field in shape)
+            for type, shape in shape_data.items()}
+
+# Doc module and the tables in it
+DOC_TABLES = {
+    "docpowers": ["powers"],
+    "docactions": ["entity_actions", "bientity_actions", "block_actions", "item_actions", "meta_actions"],
+    "docconditions": ["entity_conditions", "bientity_conditions", "block_conditions", "biome_conditions",
+                      "damage_conditions", "item_conditions", "fluid_conditions", "meta_conditions"],
+}
+
+def import_doc_module(module_name):
+    """Imports a doc module without keeping it loaded."""
+    name = "originpy." + module_name
+    module = importlib.import_module(name)
+    sys.modules.pop(name, None)
+    package = sys.modules.get("originpy")
+    if package is not None and getattr(package, module_name, None) is module:
+        delattr(package, module_name)
+    return module
+
+def load_doc_tables():
+    """Returns a dict of table name to the dict form of the table."""
+    tables = {}
+    for module_name, table_names in DOC_TABLES.items():
+        module = import_doc_module(module_name)
+        for table_name in table_names:
+            tables[table_name] = getattr(module, table_name)
+        if module_name == "docpowers":
+            tables["power"] = module.power
+    return tables
+
+def _load_specs():
+    tables = load_doc_tables()
+    specs = {name: compile_shapes(table) for name, table in tables.items() if name != "power"}
+    specs["power_fields"] = frozenset(sys.intern(name) for name in tables["power"])
+    return specs
+
+_specs = _load_specs()
+
+powers = _specs["powers"]
+power_fields = _specs["power_fields"]
+
+entity_actions = _specs["entity_actions"]
+bientity_actions = _specs["bientity_actions"]
+block_actions = _specs["block_actions"]
+item_actions = _specs["item_actions"]
+meta_actions = _specs["meta_actions"]
+
+entity_conditions = _specs["entity_conditions"]
+bientity_conditions = _specs["bientity_conditions"]
+block_conditions = _specs["block_conditions"]
+biome_conditions = _specs["biome_conditions"]
+damage_conditions = _specs["damage_conditions"]
+item_conditions = _specs["item_conditions"]
+fluid_conditions = _specs["fluid_conditions"]
+meta_conditions = _specs["meta_conditions"]
+
+del _specs
+
+def _walk_dicts(shape_data, repeat):
+    count = 0
+    for _ in range(repeat):
+        for shape in shape_data.values():
+            for field in shape:
+                field["name"]
+                for typ in field["type"]:
+                    typ["is_array"]
+                    typ["type"]
+                    count += 1
+    return count
+
+def _walk_specs(shape_data, repeat):
+    count = 0
+    for _ in range(repeat):
+        for shape in shape_data.values():
+            for field in shape:
+                field.name
+                for typ in field.types:
+                    typ.is_array
+                    typ.type
+                    count += 1
+    return count
+
+# The standard modules schema uses are imported first so only the tables are measured
+MEASURE_CODE = """
+import gc, tracemalloc, os, sys, time, importlib, subprocess, collections
+tracemalloc.start()
+%s
+gc.collect()
+print(tracemalloc.get_traced_memory()[0])
+"""
+
+def _measure(imports):
+    """Returns the memory still held after running imports in a fresh interpreter."""
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", MEASURE_CODE % imports], cwd=here,
+                            capture_output=True, text=True, check=True).stdout
+    return int(output)
+
+def compare(repeat=200):
+    """Prints the resident memory and lookup speed of the doc tables against the specs."""
+    dict_size = _measure("from originpy import docpowers, docactions, docconditions")
+    spec_size = _measure("from originpy import schema")
+    print(f"Memory: dict tables {dict_size / 1024:.1f} KiB, specs {spec_size / 1024:.1f} KiB")
+
+    dict_tables = load_doc_tables()
+    spec_tables = globals()
+    for name, walk, tables in (("dicts", _walk_dicts, dict_tables), ("specs", _walk_specs, spec_tables)):
+        start = time.perf_counter()
+        count = sum(walk(tables[table_name], repeat)
+                    for table_names in DOC_TABLES.values() for table_name in table_names)
+        elapsed = time.perf_counter() - start
+        print(f"Lookup: {name} {elapsed / count * 1e9:.1f} ns per type ({count} types)")
+
+if __name__ == "__main__":
+    compare()
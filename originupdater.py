@@ -1,11 +1,26 @@
 import os
-import re
 import json
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import zlib
 import zipfile
+import collections
+import concurrent.futures
 import shutil
-from originpy import docpowers
-from originpy import docactions
-from originpy import docconditions
+import argparse
+import hashlib
+import contextlib
+import functools
+from originpy import schema
+from originpy import particles
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # TODO:
 # [calio] Item stacks now has components field instead of tag field, which accepts an object with key-value pairs that specifies which components will be added/removed (if prefixed with !) to/from the item stack. 
@@ -17,10 +32,154 @@ from originpy import docconditions
 # [apoli] Removed the material block condition type since it has been deprecated for quite some time (since 1.20.) Use block tags to classify blocks in their own groups/materials and use the in_tag block condition type instead.
 # [apoli] Removed any fields/types that use the legacy damage source data type since it has been deprecated for quite some time (since 1.19.4.) Use damage types and vanilla damage type tags to control the properties of a damage source. Partly done
 # [apoli] Removed the client and server boolean fields from the add_velocity entity/bi-entity action types since its usage is redundant. Use the side meta action type instead.
-# Texture id changes
+# Texture id changes. Overlay done
 
 
-def log(type, trace, text):
+# Counters and timings of the current run, None unless enable_run_stats was called
+run_stats = None
+# Counters of the file being updated through the store, saved with it so
+# they can be added again when the file is reused
+_file_stats = None
+# [category, time spent in nested categories] of the fix_* functions running
+_category_stack = []
+_current_phase = None
+
+def enable_run_stats():
+    """
+    Starts collecting run statistics. The calls and rules of a file reused
+    from the store are counted again, but seconds only cover the files that
+    were actually updated.
+    """
+    global run_stats
+    run_stats = {
+        "updater_version": get_updater_version(),
+        "datapacks": [],
+        "files": {"read": 0, "written": 0, "skipped": 0, "unchanged": 0, "reused": 0},
+        "skipped_files": [],
+        "levels": {},
+        "phases": {},
+        "categories": {},
+        "phase_rules": {},
+    }
+    return run_stats
+
+def new_file_stats():
+    return {"files": {}, "skipped_files": [], "levels": {}, "categories": {}, "phase_rules": {}}
+
+def get_stats_targets():
+    """Returns the run statistics and, if a file is being stored, its statistics."""
+    if run_stats is None:
+        return []
+    if _file_stats is None:
+        return [run_stats]
+    return [run_stats, _file_stats]
+
+def get_category_stats(stats, category):
+    categories = stats["categories"]
+    if category not in categories:
+        categories[category] = {"calls": 0, "seconds": 0.0, "rules": {}} if stats is run_stats else {"calls": 0, "rules": {}}
+    return categories[category]
+
+def add_count(counts, key, amount=1):
+    counts[key] = counts.get(key, 0) + amount
+
+def time_category(function):
+    """
+    Adds the time of a fix function, without the fix functions it calls, to
+    its category. Does nothing unless run statistics are enabled.
+    """
+    category = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if run_stats is None:
+            return function(*args, **kwargs)
+        _category_stack.append([category, 0.0])
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _, children = _category_stack.pop()
+            if _category_stack:
+                _category_stack[-1][1] += elapsed
+            for stats in get_stats_targets():
+                get_category_stats(stats, category)["calls"] += 1
+            get_category_stats(run_stats, category)["seconds"] += elapsed - children
+
+    return wrapper
+
+def count_file(result, amount=1):
+    for stats in get_stats_targets():
+        add_count(stats["files"], result, amount)
+
+def count_rule(type, rule):
+    """
+    Counts a log message under the fix_* function running, or under the
+    phase if it was logged outside of the fixes.
+    """
+    for stats in get_stats_targets():
+        add_count(stats["levels"], type)
+        if _category_stack:
+            rules = get_category_stats(stats, _category_stack[-1][0])["rules"]
+        else:
+            rules = stats["phase_rules"].setdefault(_current_phase or "other", {})
+        add_count(rules, type + ": " + rule)
+
+def merge_file_stats(file_stats, file):
+    """Adds the saved statistics of a reused file to the run statistics."""
+    if run_stats is None:
+        return
+    for result, amount in file_stats["files"].items():
+        add_count(run_stats["files"], result, amount)
+    for skipped in file_stats["skipped_files"]:
+        run_stats["skipped_files"].append({"file": file, "error": skipped["error"]})
+    for type, amount in file_stats["levels"].items():
+        add_count(run_stats["levels"], type, amount)
+    for category, stats in file_stats["categories"].items():
+        category_stats = get_category_stats(run_stats, category)
+        category_stats["calls"] += stats["calls"]
+        rules = category_stats["rules"]
+        for rule, amount in stats["rules"].items():
+            add_count(rules, rule, amount)
+    for phase, phase_rules in file_stats["phase_rules"].items():
+        rules = run_stats["phase_rules"].setdefault(phase, {})
+        for rule, amount in phase_rules.items():
+            add_count(rules, rule, amount)
+
+@contextlib.contextmanager
+def time_phase(phase):
+    """Adds the time spent inside the with block to the phase."""
+    global _current_phase
+    if run_stats is None:
+        yield
+        return
+    _current_phase = phase
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_phase = None
+        add_count(run_stats["phases"], phase, time.perf_counter() - start)
+
+def skip_file(file, error):
+    print(f"Error reading '{file}': {error}. Skipping file.")
+    for stats in get_stats_targets():
+        add_count(stats["files"], "skipped")
+        stats["skipped_files"].append({"file": file, "error": str(error)})
+
+def write_run_report(file_path):
+    """Writes the run statistics as json."""
+    for stats in run_stats["categories"].values():
+        stats["seconds"] = round(stats["seconds"], 6)
+    run_stats["phases"] = {phase: round(seconds, 6) for phase, seconds in run_stats["phases"].items()}
+    write_json_file(file_path, run_stats)
+    print(f"Wrote run report to '{file_path}'")
+
+def log(type, trace, text, rule=None):
+    # The rule is the message unless the message has per-file details
+    if run_stats is not None:
+        count_rule(type, rule or text)
     file = ""
     if "file" in trace:
         file = trace["file"]
@@ -68,8 +227,12 @@ def read_json_file(file_path):
         return json.load(f)
 
 def write_json_file(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as f:
+    # Write next to the file and replace it, so a file hardlinked to the
+    # store gets a new inode instead of changing the stored copy
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4)
+    os.replace(temp_path, file_path)
 
 def is_datapack_valid(folder_path):
     """Returns true if the datapack has a data folder and pack.mcmeta file"""
@@ -120,10 +283,101 @@ def unzip_datapack(zip, extracted):
     except zipfile.BadZipFile:
         print(f"'{zip}' is not a valid ZIP file")
 
+# Files that are already compressed, deflating them again only wastes time
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".ogg", ".zip", ".gz", ".nbt", ".mca"}
+# 1980-01-01 00:00:00, the earliest date a zip can hold, so archives are reproducible
+ZIP_DOS_TIME = 0
+ZIP_DOS_DATE = (0 << 9) | (1 << 5) | 1
+
+def compress_zip_entry(file_path, level):
+    """Returns the method, crc, uncompressed size and data of a file for the zip."""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    _, extension = os.path.splitext(file_path)
+    if level > 0 and extension.lower() not in STORED_EXTENSIONS:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        if len(compressed) < len(data):
+            return zipfile.ZIP_DEFLATED, crc, len(data), compressed
+    return zipfile.ZIP_STORED, crc, len(data), data
+
+def zip_datapack(folder, zip, level=6, threads=None):
+    """
+    Zips the folder. Entries are compressed in parallel, sorted and
+    written with a fixed timestamp so the same folder always gives the
+    same zip. Returns False if the zip couldn't be written, in which case
+    nothing is left at zip.
+    """
+    _, files = get_items_from_all_folders(folder)
+    names = sorted((os.path.relpath(file, folder).replace(os.sep, "/"), file) for file in files)
+    if len(names) > 0xFFFF:
+        print(f"Too many files to zip '{folder}' ({len(names)})")
+        return False
+    threads = threads or os.cpu_count() or 1
+
+    # Written next to the zip and moved in place once complete
+    temp_path = zip + ".tmp"
+    try:
+        if not write_zip_entries(temp_path, names, level, threads):
+            print(f"'{zip}' would be bigger than 4 GiB, which is not supported")
+            os.remove(temp_path)
+            return False
+    except OSError as e:
+        print(f"Error zipping '{folder}': {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+    os.replace(temp_path, zip)
+    print(f"Zipped '{folder}' into '{zip}'")
+    return True
+
+def write_zip_entries(zip, names, level, threads):
+    """Writes the zip of the sorted (name, file) pairs. Returns False if it would need zip64."""
+    central = []
+    with open(zip, "wb") as out, concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        # Only keep a few entries in memory at a time, written in order
+        pending = collections.deque()
+        entries = iter(names)
+        while True:
+            while len(pending) < threads * 2:
+                entry = next(entries, None)
+                if entry is None:
+                    break
+                name, file = entry
+                pending.append((name, executor.submit(compress_zip_entry, file, level)))
+            if not pending:
+                break
+            name, future = pending.popleft()
+            method, crc, size, data = future.result()
+            encoded = name.encode("utf-8")
+            offset = out.tell()
+            if offset + len(data) > 0xFFFFFFFF or size > 0xFFFFFFFF:
+                for _, future in pending:
+                    future.cancel()
+                return False
+            out.write(struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, 0x0800, method, ZIP_DOS_TIME, ZIP_DOS_DATE,
+                                  crc, len(data), size, len(encoded), 0))
+            out.write(encoded)
+            out.write(data)
+            central.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | 20, 20, 0x0800, method,
+                                       ZIP_DOS_TIME, ZIP_DOS_DATE, crc, len(data), size, len(encoded),
+                                       0, 0, 0, 0, 0o100644 << 16, offset) + encoded)
+        central_offset = out.tell()
+        for header in central:
+            out.write(header)
+        central_size = out.tell() - central_offset
+        if central_offset + central_size > 0xFFFFFFFF:
+            return False
+        out.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(central), len(central),
+                              central_size, central_offset, 0))
+    return True
+
 def get_namespaces(folder_path):
     folders, _ = get_items_from_folder(folder_path)
     return folders
 
+@time_category
 def fix_damage(trace, type, json_data): 
     if "damage_type" not in json_data:
         if "source" in json_data:
@@ -133,19 +387,21 @@ def fix_damage(trace, type, json_data):
             log("ERROR", trace, "Couldn't find damage source")
 
 
+@time_category
 def fix_meta_action(trace, type, json_data):
     if type == "origins:chance":
         if "action" in json_data:
             json_data = rename_key(json_data, "action", "success_action")
             log("INFO", trace, "Renamed action to success_action")
 
+@time_category
 def fix_entity_action(trace, json_data):
     type = get_type(json_data)
-    if type in docactions.meta_actions:
+    if type in schema.meta_actions:
         fix_meta_action(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docactions.meta_actions, "Entity")
-    elif type in docactions.entity_actions:
-        iterate_through_fields(trace.copy(), type, json_data, docactions.entity_actions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_actions, "Entity")
+    elif type in schema.entity_actions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.entity_actions)
         if type == "origins:action_on_set":
             json_data["type"] = "origins:action_on_entity_set"
             log("INFO", trace, "Renamed action_on_set to action_on_entity_set")
@@ -160,16 +416,18 @@ def fix_entity_action(trace, json_data):
             log("INFO", trace, "Updated action spawn effect cloud to use components")
         if type == "origins:damage":
             fix_damage(trace, type, json_data)
-        if type == "origins:feed":
+        if type == "origins:feed" and "food" in json_data:
             json_data = rename_key(json_data, "food", "nutrition")
+            log("INFO", trace, "Renamed food to nutrition")
 
+@time_category
 def fix_bientity_action(trace, json_data):
     type = get_type(json_data)
-    if type in docactions.meta_actions:
+    if type in schema.meta_actions:
         fix_meta_action(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docactions.meta_actions, "Bi-entity")
-    elif type in docactions.bientity_actions:
-        iterate_through_fields(trace.copy(), type, json_data, docactions.bientity_actions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_actions, "Bi-entity")
+    elif type in schema.bientity_actions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.bientity_actions)
         if type == "origins:add_to_set":
             json_data["type"] = "origins:add_to_entity_set"
             log("INFO", trace, "Renamed add_to_set to add_to_entity_set")
@@ -179,35 +437,39 @@ def fix_bientity_action(trace, json_data):
         if type == "origins:damage":
             fix_damage(trace, type, json_data)
 
+@time_category
 def fix_block_action(trace, json_data):
     type = get_type(json_data)
-    if type in docactions.meta_actions:
+    if type in schema.meta_actions:
         fix_meta_action(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docactions.meta_actions, "Block")
-    elif type in docactions.block_actions:
-        iterate_through_fields(trace.copy(), type, json_data, docactions.block_actions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_actions, "Block")
+    elif type in schema.block_actions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.block_actions)
 
+@time_category
 def fix_item_action(trace, json_data):
     type = get_type(json_data)
-    if type in docactions.meta_actions:
+    if type in schema.meta_actions:
         fix_meta_action(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docactions.meta_actions, "Item")
-    elif type in docactions.item_actions:
-        iterate_through_fields(trace.copy(), type, json_data, docactions.item_actions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_actions, "Item")
+    elif type in schema.item_actions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.item_actions)
         if type == "origins:merge_nbt":
             json_data["type"] = "origins:merge_custom_data"
             log("INFO", trace, "Renamed item action type merge_nbt to merge_custom_data")
 
+@time_category
 def fix_meta_condition(trace, type, json_data):
     pass
 
+@time_category
 def fix_entity_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Entity")
-    elif type in docconditions.entity_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.entity_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Entity")
+    elif type in schema.entity_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.entity_conditions)
         if type == "origins:entity_group":
             log("INFO", trace, "Changing entity_group condition for an in_tag condition.")
             json_data["type"] = "origins:in_tag"
@@ -226,37 +488,40 @@ def fix_entity_condition(trace, json_data):
             json_data["type"] = "origins:entity_set_size"
             log("INFO", trace, "Renamed set_size to entity_set_size")
 
+@time_category
 def fix_bientity_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Bi-entity")
-    elif type in docconditions.bientity_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.bientity_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Bi-entity")
+    elif type in schema.bientity_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.bientity_conditions)
         if type == "origins:in_set":
             json_data["type"] = "origins:in_entity_set"
             log("INFO", trace, "Renamed in_set to in_entity_set")
 
+@time_category
 def fix_block_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Block")
-    elif type in docconditions.block_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.block_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Block")
+    elif type in schema.block_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.block_conditions)
         if type == "origins:replacable":
             json_data["type"] = "origins:replaceable"
             log("INFO", trace, "Renamed replacable block condition to replaceable (typo)")
         if type == "origins:material":
             log("ERROR", trace, "Material condition fix not implemented, see https://origins.readthedocs.io/en/latest/types/data_types/material/ for how to fix it")
 
+@time_category
 def fix_item_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Item")
-    elif type in docconditions.item_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.item_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Item")
+    elif type in schema.item_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.item_conditions)
         if type == "origins:harvest_level":
             # TODO: i need to know where to create the folder tags
             # https://minecraft.wiki/w/Tiers
@@ -283,21 +548,23 @@ def fix_item_condition(trace, json_data):
             log("INFO", trace, "Renamed fireproof to fire_resistant")
 
 
+@time_category
 def fix_damage_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Damage")
-    elif type in docconditions.damage_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.damage_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Damage")
+    elif type in schema.damage_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.damage_conditions)
 
+@time_category
 def fix_biome_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Biome")
-    elif type in docconditions.biome_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.biome_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Biome")
+    elif type in schema.biome_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.biome_conditions)
         if type == "origins:category":
             if json_data["category"] == "beach":
                 json_data.pop("category")
@@ -402,14 +669,16 @@ def fix_biome_condition(trace, json_data):
                 log("INFO", trace, "Updated biome category underground to c:is_underground tag")
                 log("WARNING", trace, "This tag will only work on fabric")
 
+@time_category
 def fix_fluid_condition(trace, json_data):
     type = get_type(json_data)
-    if type in docconditions.meta_conditions:
+    if type in schema.meta_conditions:
         fix_meta_condition(trace.copy(), type, json_data)
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.meta_conditions, "Fluid")
-    elif type in docconditions.fluid_conditions:
-        iterate_through_fields(trace.copy(), type, json_data, docconditions.fluid_conditions)
+        iterate_through_fields(trace.copy(), type, json_data, schema.meta_conditions, "Fluid")
+    elif type in schema.fluid_conditions:
+        iterate_through_fields(trace.copy(), type, json_data, schema.fluid_conditions)
 
+@time_category
 def fix_attribute(trace, json_data):
     if "reach-entity-attributes:attack_range" in json_data["attribute"]:
         json_data["attribute"] = json_data["attribute"].replace("reach-entity-attributes:attack_range", "minecraft:player.entity_interaction_range", 1)
@@ -418,6 +687,7 @@ def fix_attribute(trace, json_data):
         json_data["attribute"] = json_data["attribute"].replace("reach-entity-attributes:reach", "minecraft:player.block_interaction_range", 1)
         log("INFO", trace, "Updated reach attribute to work without the mod Reach Entity Attributes")
 
+@time_category
 def fix_operation(trace, json_data):
     if "addition" == json_data["operation"]:
         json_data["operation"] = json_data["operation"].replace("addition", "add_value", 1)
@@ -429,6 +699,7 @@ def fix_operation(trace, json_data):
         json_data["operation"] = json_data["operation"].replace("multiply_total", "add_multiplied_total", 1)
         log("INFO", trace, "Renamed operation multiply_total to add_multiplied_total")
 
+@time_category
 def fix_attributed_operation(trace, json_data):
     if "addition" == json_data["operation"]:
         json_data["operation"] = json_data["operation"].replace("addition", "add_base_early", 1)
@@ -440,24 +711,28 @@ def fix_attributed_operation(trace, json_data):
         json_data["operation"] = json_data["operation"].replace("multiply_total", "multiply_total_multiplicative", 1)
         log("INFO", trace, "Renamed operation multiply_total to multiply_total_multiplicative")
 
+@time_category
 def fix_value(trace, json_data):
     if "value" in json_data:
         json_data = rename_key(json_data, "value", "amount")
         log("INFO", trace, "Renamed value to amount")
     
+@time_category
 def fix_attribute_modifier(trace, json_data):
     fix_attributed_operation(trace, json_data)
     fix_value(trace,json_data)
 
+@time_category
 def fix_attributed_attribute_modifier(trace, json_data):
     fix_attribute(trace, json_data)
     if not "id" in json_data:
         id = trace["namespace"] + ":" + os.path.basename(trace["file"]).removesuffix(".json")
         json_data["id"] = id
-        log("INFO", trace, "Added id " + id + " to attributed attribute modifier")
+        log("INFO", trace, "Added id " + id + " to attributed attribute modifier", "Added id to attributed attribute modifier")
     fix_operation(trace, json_data)
     fix_value(trace,json_data)
 
+@time_category
 def fix_status_effect_instance(trace, json_data):
     if "effect" in json_data:
         json_data = rename_key(json_data, "effect", "id")
@@ -466,91 +741,34 @@ def fix_status_effect_instance(trace, json_data):
         json_data = rename_key(json_data, "is_ambient", "ambient")
         log("INFO", trace, "Renamed is_ambient to ambient")
 
+@time_category
 def fix_food_component(trace, json_data):
     if "hunger" in json_data:
         json_data = rename_key(json_data, "hunger", "saturation")
+        log("INFO", trace, "Renamed hunger to saturation")
     if "always_edible" in json_data:
         json_data = rename_key(json_data, "always_edible", "can_always_eat")
+        log("INFO", trace, "Renamed always_edible to can_always_eat")
     if "snack" in json_data and json_data["snack"]:
         json_data.pop("snack")
         json_data["eat_seconds"] = 0.8
+        log("INFO", trace, "Replaced snack with eat_seconds")
 
+@time_category
 def fix_crafting_recipe(trace, json_data):
     log("ERROR", trace, "Fixing crafting recipes is unimplemented.")
 
+@time_category
 def fix_particle_effect(trace, json_data):
     if 'params' in json_data:
         old_params = json_data['params']
         if isinstance(old_params, str):
-            if json_data['type'] in {"block", "minecraft:block", "block_marker", "minecraft:block_marker", "falling_dust", "minecraft:falling_dust"}:
-                pattern_blockstate = re.compile(r"^(?P<block>[a-z0-9/:._-]+)(?:\[(?P<props>[a-z0-9/._-]+=[a-z0-9/._-]+(?:,\s+[a-z0-9/._-]+=[a-z0-9/._-]+)*)])?$")
-                pattern_props = re.compile(r"(?P<property>[a-z0-9/._-]+)=(?P<value>[a-z0-9/._-]+)")
-
-                match = pattern_blockstate.match(old_params)
-                block = match.group("block")
-                prop_str = match.group("props")
-                new_params = {"block_state": {"Name": block}}
-                if prop_str:
-                    properties = {}
-                    for prop_match in pattern_props.finditer(prop_str):
-                        state = prop_match.groupdict()
-                        if state["value"] == 'true':
-                            state["value"] = True
-                        elif state["value"] == 'false':
-                            state["value"] = False
-                        elif state["value"].isnumeric():
-                            state["value"] = float(state["value"])
-
-                        properties.update({state["property"]: state['value']})
-                    new_params["Properties"] = properties
-
-            elif json_data['type'] in {'dragon_breath', 'minecraft:dragon_breath'}:
-                new_params = {"power": float(old_params)}
-
-            elif json_data['type'] in {"dust", "minecraft:dust"}:
-                pattern = re.compile(r"(?P<red>\d(\.\d+)?) (?P<green>\d(\.\d+)?) (?P<blue>\d(\.\d+)?) (?P<scale>\d(\.\d+)?)")
-                groups = pattern.match(old_params).groupdict()
-                new_params = {
-                    "color": [
-                        float(groups['red']),
-                        float(groups['green']),
-                        float(groups['blue'])
-                    ],
-                    "scale": float(groups['scale'])
-                }
-
-            elif json_data['type'] in {"dust_color_transition", "minecraft:dust_color_transition"}:
-                pattern = re.compile(r"(?P<from_red>\d(\.\d+)?) (?P<from_green>\d(\.\d+)?) (?P<from_blue>\d(\.\d+)?) (?P<scale>\d(\.\d+)?) (?P<to_red>\d(\.\d+)?) (?P<to_green>\d(\.\d+)?) (?P<to_blue>\d(\.\d+)?)")  # Ugly...
-                groups = pattern.match(old_params).groupdict()
-                new_params = {
-                    "from_color": [
-                        float(groups['from_red']),
-                        float(groups['from_green']),
-                        float(groups['from_blue'])
-                    ],
-                    "to_color":   [
-                        float(groups['to_red']),
-                        float(groups['to_green']),
-                        float(groups['to_blue'])
-                    ],
-                    "scale":      float(groups['scale'])
-                }
-
-            elif json_data['type'] in {"item", "minecraft:item"}:
-                new_params = {"item": {"id": old_params}}
-
-            elif json_data['type'] in {"sculk_charge", "minecraft:sculk_charge"}:
-                new_params = {"roll": float(old_params)}
-
-            elif json_data['type'] in {"shriek", "minecraft:shriek"}:
-                new_params = {"delay": float(old_params)}
-
-            elif json_data['type'] in {"vibration", "minecraft:vibration"}:
-                pattern = re.compile(r"(?P<posX>\d+(\.\d+)?) (?P<posY>\d+(\.\d+)?) (?P<posZ>\d+(\.\d+)?) (?P<delay>\d+(\.\d+)?)")
-                groups = pattern.match(old_params).groupdict()
-                new_params = {"destination": {"type": "block", "pos": [float(groups['posX']), float(groups['posY']), float(groups['posZ'])]}, "arrival_in_ticks": float(groups['delay'])}
-
-            else:
+            try:
+                new_params = particles.parse_params(json_data['type'], old_params)
+            except ValueError as e:
+                log("ERROR", trace, str(e), "Invalid particle params")
+                return
+            if new_params is None:
                 new_params = old_params  # Fallback
 
             json_data["params"] = new_params
@@ -613,17 +831,17 @@ def select_type(trace, type, field_data, meta_type = None):
         # if theres something else imma cry
 
 
-# Its given a list of dicts that indicate if the field is an array and what type it is
+# Its given a tuple of TypeSpecs that indicate if the field is an array and what type it is
 # then fixes it
 def find_allowed_types(trace, allowed_types, field_data, meta_type = None):
     for typ in allowed_types:
-        if typ["is_array"]:
+        if typ.is_array:
             for i, object in enumerate(field_data):
                 new_trace = trace.copy()
                 new_trace["fields"] = new_trace["fields"] + "[" + str(i) + "]"
-                select_type(new_trace, typ["type"], object, meta_type)
+                select_type(new_trace, typ.type, object, meta_type)
         else:
-            select_type(trace.copy(), typ["type"], field_data, meta_type)
+            select_type(trace.copy(), typ.type, field_data, meta_type)
     return field_data
 
 # Detects the type and iterates through that type's fields, fixing each
@@ -634,17 +852,37 @@ def iterate_through_fields(trace, type, json_data, shape_data, meta_type = None)
         for field in shape:
             # Check if the field is even in the actual power
             # Could be done the other way around, but i dont want to parse non-existing fields
-            field_name = field["name"]
+            field_name = field.name
             new_trace = trace.copy()
             if field_name in json_data:
                 new_trace["fields"] = new_trace["fields"] + "." + field_name
                 field_data = json_data[field_name]
                 # Check what types are allowed for the field
-                field_data = find_allowed_types(new_trace.copy(), field["type"], field_data, meta_type)
+                field_data = find_allowed_types(new_trace.copy(), field.types, field_data, meta_type)
                 json_data[field_name] = field_data
     else:
-        log("ERROR", trace, "Field " + type + " does not exist or belongs to an addon.")
+        log("ERROR", trace, "Field " + type + " does not exist or belongs to an addon.", "Field does not exist or belongs to an addon.")
 
+@time_category
+def fix_sprite_texture(trace, json_data, field_name):
+    """
+    Changes a texture location (ns:textures/path.png) into a sprite id
+    (ns:path). The png is then moved by update_assets.
+    """
+    texture = json_data[field_name]
+    namespace, _, path = texture.rpartition(":")
+    if namespace == "":
+        namespace = "minecraft"
+    if not (path.startswith("textures/") and path.endswith(".png")):
+        return
+    sprite = path.removeprefix("textures/").removesuffix(".png")
+    id = namespace + ":" + sprite
+    json_data[field_name] = id
+    log("INFO", trace, "Renamed texture " + texture + " to sprite " + id, "Renamed texture to sprite")
+    if "asset_moves" in trace:
+        trace["asset_moves"].append((namespace, path, "textures/gui/sprites/" + sprite + ".png", trace["file"]))
+
+@time_category
 def fix_power(trace, json_data):
     log("INFO", trace, "Fixing power")
     type = get_type(json_data)
@@ -654,15 +892,9 @@ def fix_power(trace, json_data):
         json_data["condition"] = condition
     if type == "origins:overlay":
         if "texture" in json_data:
-            #path = os.path(json_data["texture"])
-            #namespace = path.parts[1]
-            #name = path.stem
-            #id = f"{namespace}:{name}"
-            #json_data["texture"] = id
-            #log("INFO", trace, "Renamed location of texture to " + id + ", make sure the texture is in assets/" + namespace + "/textures/overlay/sprites/" + name + ".png")
-            log("ERROR", trace, "Overlay texture change not implemented (if even necessary)")
+            fix_sprite_texture(trace, json_data, "texture")
 
-    iterate_through_fields(trace.copy(), type, json_data, docpowers.powers)
+    iterate_through_fields(trace.copy(), type, json_data, schema.powers)
 
     if type == "origins:entity_group":
         json_data["type"] = "origins:modify_type_tag"
@@ -678,63 +910,392 @@ def fix_power(trace, json_data):
             log("ERROR", trace, "Entity Group not found, was unable to find correct tag.")
         json_data = rename_key(json_data, "group", "tag")
 
-def update_powers(trace, folder_path):
-    _, files = get_items_from_all_folders(folder_path)
-    for file in files:
-        trace["file"] = file
+# origins:multiple files bigger than this are updated one sub-power at a time
+STREAMING_SIZE = 8 * 1024 * 1024
+STREAMING_CHUNK = 64 * 1024
 
-        try:
-            json_data = read_json_file(file)
-        except Exception as e:
-            print(f"Error reading '{file}': {e}. Skipping file.")
-            continue
+def iterate_json_object(f):
+    """
+    Yields the key and value of each entry of the json object in the file,
+    keeping in memory only the entry being read.
+    """
+    decoder = json.JSONDecoder()
+    state = {"buffer": "", "pos": 0, "eof": False, "chunk": STREAMING_CHUNK}
+
+    def read_more():
+        # Drop what was already parsed and grow the read size while a
+        # single value doesn't fit, so big values aren't parsed too often
+        data = f.read(state["chunk"])
+        if not data:
+            state["eof"] = True
+        state["buffer"] = state["buffer"][state["pos"]:] + data
+        state["pos"] = 0
+        state["chunk"] *= 2
+
+    def skip_whitespace():
+        while True:
+            buffer = state["buffer"]
+            pos = state["pos"]
+            while pos < len(buffer) and buffer[pos] in " \t\n\r":
+                pos += 1
+            state["pos"] = pos
+            if pos < len(buffer) or state["eof"]:
+                return
+            read_more()
+
+    def expect(chars):
+        skip_whitespace()
+        if state["pos"] >= len(state["buffer"]):
+            raise ValueError("Unexpected end of file")
+        char = state["buffer"][state["pos"]]
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} but found {char!r}")
+        state["pos"] += 1
+        return char
+
+    def decode():
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(state["buffer"], state["pos"])
+                # A number cut by the end of the buffer still decodes (12 out
+                # of 12.5), so it is only complete once a delimiter follows
+                complete = isinstance(value, (dict, list, str)) or state["eof"] or \
+                    (end < len(state["buffer"]) and state["buffer"][end] in " \t\n\r,:}]")
+                if complete:
+                    state["pos"] = end
+                    state["chunk"] = STREAMING_CHUNK
+                    return value
+            except json.JSONDecodeError:
+                if state["eof"]:
+                    raise
+            read_more()
+
+    def expect_end():
+        skip_whitespace()
+        if state["pos"] < len(state["buffer"]):
+            raise ValueError("Extra data after the json object")
+
+    expect("{")
+    skip_whitespace()
+    if state["buffer"][state["pos"]:state["pos"] + 1] == "}":
+        state["pos"] += 1
+        expect_end()
+        return
+    while True:
+        key = decode()
+        if not isinstance(key, str):
+            raise ValueError("Expected a key")
+        expect(":")
+        yield key, decode()
+        if expect(",}") == "}":
+            expect_end()
+            return
 
-        type = get_type(json_data)
-        trace["fields"] = ""
-        
-        if type == "origins:multiple":
-            shape = docpowers.powers[type]
-            for field_name in json_data:
-                new_trace = trace.copy()
-                if field_name not in shape and field_name not in docpowers.power:
+def update_power_file_streaming(trace, file):
+    """
+    Same as update_power_file for origins:multiple, but parses, fixes and
+    writes one sub-power at a time. Returns False if the file isn't an
+    origins:multiple power.
+    """
+    trace["file"] = file
+    trace["fields"] = ""
+    temp_path = file + ".tmp"
+    try:
+        # Look for the type first in case it isn't the first key
+        with open(file, "r", encoding="utf-8") as f:
+            type = None
+            for field_name, field_data in iterate_json_object(f):
+                if field_name == "type":
+                    type = field_data
+                    break
+    except (ValueError, OSError) as e:
+        skip_file(file, e)
+        return True
+    if type is None or get_type({"type": type}) != "origins:multiple":
+        return False
+
+    shape = {field.name for field in schema.powers["origins:multiple"]}
+    try:
+        with open(file, "r", encoding="utf-8") as f, open(temp_path, "w", encoding="utf-8") as out:
+            out.write("{")
+            separator = "\n"
+            fields = iterate_json_object(f)
+            while True:
+                # Only reading errors skip the file, errors of the fixes are
+                # raised like in update_power_file
+                try:
+                    field_name, field_data = next(fields)
+                except StopIteration:
+                    break
+                except ValueError as e:
+                    skip_file(file, e)
+                    return True
+                if field_name not in shape and field_name not in schema.power_fields:
+                    new_trace = trace.copy()
                     new_trace["fields"] = new_trace["fields"] + "." + field_name
-                    field_data = json_data[field_name]
                     fix_power(new_trace, field_data)
-                    json_data[field_name] = field_data
-        else:
-            fix_power(trace.copy(), json_data)
+                # Same output as json.dump with indent=4
+                value = json.dumps(field_data, indent=4).replace("\n", "\n    ")
+                out.write(separator + "    " + json.dumps(field_name) + ": " + value)
+                separator = ",\n"
+            out.write("}" if separator == "\n" else "\n}")
+        os.replace(temp_path, file)
+    except OSError as e:
+        skip_file(file, e)
+        return True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    count_file("read")
+    count_file("written")
+    return True
 
-        write_json_file(file, json_data)
+def update_power_file(trace, file):
+    trace["file"] = file
 
+    if os.path.getsize(file) >= STREAMING_SIZE and update_power_file_streaming(trace, file):
+        return
+
+    try:
+        json_data = read_json_file(file)
+    except Exception as e:
+        skip_file(file, e)
+        return
+    count_file("read")
+    if run_stats is not None:
+        before = json.dumps(json_data, sort_keys=True)
+
+    type = get_type(json_data)
+    trace["fields"] = ""
+    
+    if type == "origins:multiple":
+        shape = {field.name for field in schema.powers[type]}
+        for field_name in json_data:
+            new_trace = trace.copy()
+            if field_name not in shape and field_name not in schema.power_fields:
+                new_trace["fields"] = new_trace["fields"] + "." + field_name
+                field_data = json_data[field_name]
+                fix_power(new_trace, field_data)
+                json_data[field_name] = field_data
+    else:
+        fix_power(trace.copy(), json_data)
+
+    if run_stats is not None and before == json.dumps(json_data, sort_keys=True):
+        count_file("unchanged")
+    write_json_file(file, json_data)
+    count_file("written")
+
+def update_powers(trace, folder_path):
+    _, files = get_items_from_all_folders(folder_path)
+    for file in files:
+        update_file(trace, file, update_power_file)
+
+@time_category
 def fix_item_stack(trace, stack):
-    stack = rename_key(stack, "item", "id")
+    if "item" in stack:
+        stack = rename_key(stack, "item", "id")
+        log("INFO", trace, "Renamed item to id")
     if "amount" in stack:
         stack = rename_key(stack, "amount", "count")
+        log("INFO", trace, "Renamed amount to count")
     if "tag" in stack:
         # TODO: handle nbt tag
         log("ERROR", trace, "Fixing nbt tags is unimplemented.")
     return stack
 
+@time_category
 def fix_icon(trace, origin):
     if "icon" in origin:
         icon = origin["icon"]
         # Convert icon to object
         if isinstance(icon, str):
             icon = {'item': icon}
+            log("INFO", trace, "Converted icon to an item stack")
         origin["icon"] = fix_item_stack(trace.copy(), icon)
     return origin
 
+def update_origin_file(trace, file):
+    trace["file"] = file
+    try:
+        origin = read_json_file(file)
+    except Exception as e:
+        skip_file(file, e)
+        return
+    count_file("read")
+    if run_stats is not None:
+        before = json.dumps(origin, sort_keys=True)
+    origin = fix_icon(trace.copy(), origin)
+    if run_stats is not None and before == json.dumps(origin, sort_keys=True):
+        count_file("unchanged")
+    write_json_file(file, origin)
+    count_file("written")
+
 def update_origins(trace, folder_path):
     _, files = get_items_from_all_folders(folder_path)
     for file in files:
-        trace["file"] = file
+        update_file(trace, file, update_origin_file)
+
+FICLONE = 0x40049409
+STORE_FILE_TOKEN = "\0file\0"
+_updater_version = None
+
+def get_updater_version():
+    """Returns a hash of the updater sources, so the store is invalidated when they change."""
+    global _updater_version
+    if _updater_version is None:
+        digest = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        sources = [os.path.abspath(__file__)]
+        _, files = get_items_from_folder(os.path.join(here, "originpy"))
+        sources += sorted(os.path.join(here, "originpy", file) for file in files if file.endswith(".py"))
+        for source in sources:
+            with open(source, "rb") as f:
+                digest.update(f.read())
+        _updater_version = digest.hexdigest()[:16]
+    return _updater_version
+
+def get_store_key(trace, file, update):
+    """
+    Returns the store key of a file. Besides its content it depends on
+    everything the fixes read from the trace (the namespace and the file
+    name are used for generated ids).
+    """
+    digest = hashlib.sha256()
+    for part in (get_updater_version(), update.__name__, trace["namespace"], os.path.basename(file)):
+        digest.update(part.encode("utf-8") + b"\0")
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(STREAMING_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_file(file_path):
+    """Returns the sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(STREAMING_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def open_store(folder, hardlinks=False):
+    """
+    Returns the store settings put in the trace. Outputs are only
+    hardlinked to the store if hardlinks is set, since editing a
+    hardlinked file in place changes the stored copy too.
+    """
+    return {"folder": folder, "hardlinks": hardlinks, "stats": {"updated": 0, "reused": 0}}
+
+def link_file(source, target, hardlinks=False):
+    """
+    Replaces target by source using a reflink, a hardlink if allowed, or
+    a copy, whichever the filesystem supports first.
+    """
+    temp_path = target + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    try:
+        if fcntl is None:
+            raise OSError("reflinks not supported")
+        with open(source, "rb") as src, open(temp_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         try:
-            origin = read_json_file(file)
-        except Exception as e:
-            print(f"Error reading '{file}': {e}. Skipping file.")
-            continue
-        origin = fix_icon(trace.copy(), origin)
-        write_json_file(file, origin)
+            if not hardlinks:
+                raise OSError("hardlinks not allowed")
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+
+def read_store_entry(stored):
+    """
+    Returns the metadata of a stored file, or None if it is missing, its
+    output doesn't match the hash it was stored with, or the run statistics
+    need counters it was stored without.
+    """
+    try:
+        meta = read_json_file(stored + ".meta")
+        if not os.path.isfile(stored + ".log") or hash_file(stored + ".json") != meta["sha256"]:
+            return None
+        if run_stats is not None and "stats" not in meta:
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return meta
+
+def update_file_with_store(trace, file, update):
+    """
+    Updates a file through the store in trace["store"]. If an identical
+    file was already updated its output is linked in and its log replayed,
+    otherwise it is updated and added to the store.
+    """
+    global _file_stats
+    store = trace["store"]
+    stats = store["stats"]
+    key = get_store_key(trace, file, update)
+    stored = os.path.join(store["folder"], key[:2], key)
+
+    meta = read_store_entry(stored)
+    if meta is not None:
+        with open(stored + ".log", "r", encoding="utf-8") as f:
+            for line in f:
+                print(line.replace(STORE_FILE_TOKEN, file), end="")
+        trace["asset_moves"].extend((*move, file) for move in meta["assets"])
+        link_file(stored + ".json", file, store["hardlinks"])
+        stats["reused"] += 1
+        count_file("reused")
+        if "stats" in meta:
+            merge_file_stats(meta["stats"], file)
+        return
+
+    os.makedirs(os.path.dirname(stored), exist_ok=True)
+    temp_path = f"{stored}.{os.getpid()}.tmp"
+    log_path = f"{stored}.{os.getpid()}.log.tmp"
+    moves_before = len(trace["asset_moves"])
+    # The log goes to a file so big files don't keep it all in memory
+    _file_stats = new_file_stats() if run_stats is not None else None
+    try:
+        try:
+            with open(log_path, "w", encoding="utf-8") as output:
+                with contextlib.redirect_stdout(output):
+                    update(trace, file)
+        finally:
+            file_stats = _file_stats
+            _file_stats = None
+            # The log is shown even if the update failed
+            if os.path.exists(log_path):
+                with open(log_path, "r", encoding="utf-8") as output, open(temp_path, "w", encoding="utf-8") as f:
+                    for line in output:
+                        print(line, end="")
+                        f.write(line.replace(file, STORE_FILE_TOKEN))
+        os.replace(temp_path, stored + ".log")
+        stats["updated"] += 1
+
+        # Stored files are shared by every pack linked to them, keep them read only
+        shutil.copyfile(file, temp_path)
+        os.chmod(temp_path, 0o444)
+        os.replace(temp_path, stored + ".json")
+        # Written last, an entry without it is never reused
+        # Moves are stored without the power file, which differs in each pack
+        moves = [move[:3] for move in trace["asset_moves"][moves_before:]]
+        meta = {"sha256": hash_file(stored + ".json"), "assets": moves}
+        if file_stats is not None:
+            meta["stats"] = file_stats
+        write_json_file(stored + ".meta", meta)
+    finally:
+        # Nothing is left in the store if the update failed
+        for path in (log_path, temp_path):
+            if os.path.exists(path):
+                os.remove(path)
+    link_file(stored + ".json", file, store["hardlinks"])
+
+def update_file(trace, file, update):
+    if trace.get("store"):
+        update_file_with_store(trace, file, update)
+    else:
+        update(trace, file)
 
 def update_folders(trace, path):
     folders, _ = get_items_from_folder(path)
@@ -781,24 +1342,338 @@ def update_folders(trace, path):
         os.rename(os.path.join(path, "functions"), os.path.join(path, "function"))
         log("INFO", trace, "Renamed folder functions to function")
 
-def start_updating(folder_path):
-    if not is_datapack_valid(folder_path):
+def index_assets(assets_path):
+    """Returns a dict of every file in assets as namespace/path to its full path."""
+    index = {}
+    for root, _, files in os.walk(assets_path):
+        relative = os.path.relpath(root, assets_path).replace(os.sep, "/")
+        for file in files:
+            index[relative + "/" + file] = os.path.join(root, file)
+    return index
+
+def update_assets(trace, folder_path):
+    """
+    Links the textures that became sprites into textures/gui/sprites, with
+    their .mcmeta if they are animated. The old path is kept for anything
+    else that uses it, and files are only renamed if hardlinks aren't
+    supported, never copied.
+    """
+    # The first power using each texture is the one the logs point to
+    moves = {}
+    for namespace, old_path, new_path, file in sorted(trace.get("asset_moves", [])):
+        moves.setdefault((namespace, old_path, new_path), file)
+    if not moves:
         return
+    trace["fields"] = ""
+    assets_path = os.path.join(folder_path, "assets")
+    index = index_assets(assets_path)
+    for (namespace, old_path, new_path), file in sorted(moves.items()):
+        trace["file"] = file
+        old_key = namespace + "/" + old_path
+        new_key = namespace + "/" + new_path
+        if new_key in index:
+            continue
+        if old_key not in index:
+            log("WARNING", trace, "Texture " + old_key + " not found, make sure it is in assets/" + new_key, "Texture not found")
+            continue
+        renamed = False
+        for extension in ("", ".mcmeta"):
+            if old_key + extension not in index:
+                continue
+            source = index[old_key + extension]
+            target = os.path.join(assets_path, namespace, *new_path.split("/")) + extension
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                os.rename(source, target)
+                del index[old_key + extension]
+                renamed = True
+            index[new_key + extension] = target
+        if renamed:
+            old_folder = os.path.dirname(os.path.join(assets_path, namespace, *old_path.split("/")))
+            remove_empty_folders(old_folder, os.path.join(assets_path, namespace))
+            log("INFO", trace, "Moved texture assets/" + old_key + " to assets/" + new_key, "Moved texture")
+        else:
+            log("INFO", trace, "Linked texture assets/" + old_key + " to assets/" + new_key, "Linked texture")
+
+def remove_empty_folders(folder, root):
+    """Removes folder and its parents while they are empty, stopping at root."""
+    while folder != root and not os.listdir(folder):
+        os.rmdir(folder)
+        folder = os.path.dirname(folder)
+
+def start_updating(folder_path, store=None):
+    if not is_datapack_valid(folder_path):
+        return False
     data_path = os.path.join(folder_path,"data")
     namespaces = get_namespaces(data_path)
     trace = {}
     trace["data_folder"] = data_path
+    trace["asset_moves"] = []
+    if store is not None:
+        trace["store"] = store
     
+    if run_stats is not None:
+        run_stats["datapacks"].append(folder_path)
+
     # Update each namespace
     for namespace in namespaces:
         path = os.path.join(data_path, namespace)
         trace["namespace"] = namespace
-        update_powers(trace.copy(), os.path.join(path,"powers"))
-        update_origins(trace.copy(), os.path.join(path,"origins"))
-        update_folders(trace.copy(), path)
+        with time_phase("powers"):
+            update_powers(trace.copy(), os.path.join(path,"powers"))
+        with time_phase("origins"):
+            update_origins(trace.copy(), os.path.join(path,"origins"))
+        with time_phase("folders"):
+            update_folders(trace.copy(), path)
+    with time_phase("assets"):
+        update_assets(trace.copy(), folder_path)
+    return True
+
+# inotify event masks, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+def get_file_snapshot(folder_path):
+    """Returns a dict of every file inside folder_path with its modification time and size."""
+    snapshot = {}
+    _, files = get_items_from_all_folders(folder_path)
+    for file in files:
+        try:
+            stat = os.stat(file)
+        except OSError:
+            continue
+        snapshot[file] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
 
-def open_datapack():
-    folder = input("Enter the folder path: ").strip()
+def make_polling_watcher(folder_path):
+    """
+    Returns a function that blocks until files inside folder_path change
+    (or the timeout expires) and returns the set of changed paths.
+    """
+    state = {"snapshot": get_file_snapshot(folder_path)}
+
+    def wait(timeout, interval=0.5):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = get_file_snapshot(folder_path)
+            old = state["snapshot"]
+            changed = {file for file in snapshot if old.get(file) != snapshot[file]}
+            changed.update(file for file in old if file not in snapshot)
+            state["snapshot"] = snapshot
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return changed
+                time.sleep(min(interval, remaining))
+            else:
+                time.sleep(interval)
+
+    return wait
+
+def make_inotify_watcher(folder_path):
+    """
+    Same as make_polling_watcher but uses inotify. Returns None if inotify
+    isn't available (not on Linux, or libc can't be loaded).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    watches = {}
+
+    def add_watch(path):
+        wd = libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            watches[wd] = path
+
+    def add_tree(path, changed):
+        # Files may be written before the watch on a new folder is set up
+        add_watch(path)
+        folders, files = get_items_from_all_folders(path)
+        for folder in folders:
+            add_watch(folder)
+        changed.update(files)
+
+    add_watch(folder_path)
+    for folder in get_items_from_all_folders(folder_path)[0]:
+        add_watch(folder)
+
+    def read_events(changed):
+        buffer = os.read(fd, 64 * 1024)
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = struct.unpack_from("iIII", buffer, offset)
+            offset += struct.calcsize("iIII")
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, report everything as changed
+                changed.update(get_items_from_all_folders(folder_path)[1])
+                continue
+            if mask & IN_DELETE_SELF:
+                watches.pop(wd, None)
+                continue
+            if wd not in watches or not name:
+                continue
+            path = os.path.join(watches[wd], os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    add_tree(path, changed)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                changed.add(path)
+
+    def wait(timeout):
+        changed = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not changed:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                break
+            read_events(changed)
+        return changed
+
+    return wait
+
+def get_migrated_kind(folder_path, file):
+    """
+    Returns the namespace and "powers" or "origins" if the file is a json
+    file in one of those folders, otherwise None (editor backups, swap
+    files...).
+    """
+    if not file.endswith(".json"):
+        return None
+    parts = os.path.relpath(file, folder_path).split(os.sep)
+    if len(parts) >= 4 and parts[0] == "data" and parts[2] in ("powers", "origins"):
+        return parts[1], parts[2]
+    return None
+
+def migrate_changed_files(source, output, changed):
+    """Copies the changed power and origin files into output and updates them there."""
+    updated = 0
+    trace = {"data_folder": os.path.join(output, "data"), "asset_moves": []}
+    for file in sorted(changed):
+        kind = get_migrated_kind(source, file)
+        if kind is None:
+            continue
+        namespace, folder = kind
+        target = os.path.join(output, os.path.relpath(file, source))
+        if not os.path.isfile(file):
+            if os.path.isfile(target):
+                os.remove(target)
+                print(f"Removed '{target}'")
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Keep the last good output until the new one is updated, files are
+        # often half edited while watching
+        previous = target + ".previous"
+        has_previous = os.path.isfile(target)
+        if has_previous:
+            os.replace(target, previous)
+        trace["namespace"] = namespace
+        asset_moves = len(trace["asset_moves"])
+        try:
+            shutil.copy2(file, target)
+            if folder == "powers":
+                update_power_file(trace.copy(), target)
+            else:
+                update_origin_file(trace.copy(), target)
+        except Exception as e:
+            log("ERROR", {"file": file}, f"Couldn't update the file ({e.__class__.__name__}: {e}), keeping the last output",
+                "Couldn't update the file")
+            del trace["asset_moves"][asset_moves:]
+            if has_previous:
+                os.replace(previous, target)
+            elif os.path.isfile(target):
+                os.remove(target)
+            continue
+        if has_previous:
+            os.remove(previous)
+        updated += 1
+    update_assets(trace.copy(), output)
+    return updated
+
+def watch_datapack(source, output, debounce=0.2):
+    """
+    Migrates source into output, then keeps watching source and migrates
+    again only the power and origin files that change.
+    """
+    if not is_datapack_valid(source):
+        return
+    if os.path.exists(output):
+        answer = input(f"Folder '{output}' already exists. Overwrite? (y/n): ").strip().lower()
+        if answer != "y":
+            print("Watch canceled.")
+            return
+        shutil.rmtree(output)
+
+    # Start watching before copying so no edit is missed
+    wait = make_inotify_watcher(source)
+    if wait is None:
+        print("inotify not available, falling back to polling")
+        wait = make_polling_watcher(source)
+
+    start = time.perf_counter()
+    shutil.copytree(source, output)
+    start_updating(output)
+    print(f"Initial migration done in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"Watching '{source}' for changes, press Ctrl+C to stop")
+
+    latencies = []
+    try:
+        while True:
+            changed = wait(None)
+            detected = time.perf_counter()
+            # Coalesce bursts of events (editors saving several files, swap files...)
+            while True:
+                more = wait(debounce)
+                if not more:
+                    break
+                changed.update(more)
+            migrate_start = time.perf_counter()
+            updated = migrate_changed_files(source, output, changed)
+            end = time.perf_counter()
+            if updated == 0:
+                continue
+            latency = (end - detected) * 1000
+            latencies.append(latency)
+            print(f"Updated {updated} file(s) in {(end - migrate_start) * 1000:.1f} ms, "
+                  f"latency {latency:.1f} ms "
+                  f"(min {min(latencies):.1f}, avg {sum(latencies) / len(latencies):.1f}, "
+                  f"max {max(latencies):.1f} over {len(latencies)} updates)")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def update_datapacks(folders, store):
+    """
+    Updates several datapacks sharing a store, so files that are the same
+    in many packs are only updated once.
+    """
+    for folder in folders:
+        print(f"Updating '{folder}'")
+        start_updating(folder, store)
+    stats = store["stats"]
+    print(f"Updated {stats['updated']} file(s), reused {stats['reused']} from '{store['folder']}'")
+
+def find_datapack(folder):
+    """Returns the datapack folder, unzipping it first if needed, or None if not found."""
     # If .zip is specified, open the zip
     if folder.endswith(".zip") and os.path.isfile(folder):
         zip_path = folder
@@ -806,16 +1681,70 @@ def open_datapack():
         unzip_datapack(zip_path, folder)
     # Try opening the folder
     if os.path.isdir(folder):
-        start_updating(folder)
+        return folder
     # Check for zip again
+    zip_path = f"{folder}.zip"
+    if os.path.isfile(zip_path):
+        unzip_datapack(zip_path, folder)
+        if os.path.isdir(folder):
+            return folder
     else:
-        zip_path = f"{folder}.zip"
-        if os.path.isfile(zip_path):
-            unzip_datapack(zip_path, folder)
-            if os.path.isdir(folder):
-                start_updating(folder)
+        print("Invalid folder path.")
+    return None
+
+def open_datapack():
+    folder = input("Enter the folder path: ").strip()
+    folder = find_datapack(folder)
+    if folder is not None:
+        start_updating(folder)
+
+def main():
+    parser = argparse.ArgumentParser(description="Updates Origins datapacks to the latest version.")
+    parser.add_argument("datapacks", nargs="*", metavar="datapack", help="datapack folder or zip, asked for if not given")
+    parser.add_argument("--store", metavar="FOLDER", help="reuse updated files from FOLDER across datapacks and runs")
+    parser.add_argument("--store-hardlinks", action="store_true", help="hardlink reused files to the --store copy when reflinks aren't supported, the files are then read only")
+    parser.add_argument("--report", metavar="FILE", help="write counters and timings of the run to FILE as json")
+    parser.add_argument("--watch", metavar="OUTPUT", help="migrate into OUTPUT and keep updating it as the datapack changes")
+    parser.add_argument("--zip", metavar="OUTPUT", help="zip the updated datapack into OUTPUT")
+    parser.add_argument("--zip-level", type=int, default=6, choices=range(0, 10), metavar="0-9", help="deflate level of --zip, 0 stores every file (default: 6)")
+    args = parser.parse_args()
+
+    if not args.datapacks:
+        open_datapack()
+        return
+    if len(args.datapacks) > 1 and (args.watch or args.zip):
+        parser.error("--watch and --zip take a single datapack")
+    if args.watch and (args.zip or args.store or args.report):
+        parser.error("--watch can't be used with --zip, --store or --report")
+    if args.report:
+        enable_run_stats()
+    if args.store_hardlinks and not args.store:
+        parser.error("--store-hardlinks needs --store")
+    store = open_store(args.store, args.store_hardlinks) if args.store else None
+    start = time.perf_counter()
+    zipped = True
+
+    folders = [find_datapack(datapack) for datapack in args.datapacks]
+    folders = [folder for folder in folders if folder is not None]
+    if len(folders) > 1:
+        if store is not None:
+            update_datapacks(folders, store)
         else:
-            print("Invalid folder path.")
+            for folder in folders:
+                start_updating(folder)
+    elif len(folders) == 1:
+        folder = folders[0]
+        if args.watch:
+            watch_datapack(folder, args.watch)
+        elif start_updating(folder, store) and args.zip:
+            with time_phase("zip"):
+                zipped = zip_datapack(folder, args.zip, args.zip_level)
+
+    if args.report:
+        run_stats["seconds"] = round(time.perf_counter() - start, 6)
+        write_run_report(args.report)
+    if not zipped:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    open_datapack()
+    main()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def datapack(tmp_path):
+    """A small datapack with a power, an origin and a texture."""
+    folder = tmp_path / "pack"
+    (folder / "data" / "ns" / "powers").mkdir(parents=True)
+    (folder / "data" / "ns" / "origins").mkdir(parents=True)
+    (folder / "assets" / "ns" / "textures" / "gui").mkdir(parents=True)
+    (folder / "pack.mcmeta").write_text('{"pack": {"pack_format": 15}}')
+    (folder / "data" / "ns" / "powers" / "power.json").write_text(
+        '{"type": "origins:particle", "particle": {"type": "minecraft:dust", "params": "1 0 0 1"}}')
+    (folder / "data" / "ns" / "origins" / "origin.json").write_text('{"icon": "minecraft:apple"}')
+    (folder / "assets" / "ns" / "textures" / "gui" / "overlay.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 8)
+    return folder
@@ -0,0 +1,44 @@
+import os
+
+import originupdater
+
+
+def make_overlay(datapack, texture="ns:textures/gui/overlay.png"):
+    (datapack / "data" / "ns" / "powers" / "overlay.json").write_text(
+        '{"type": "origins:overlay", "texture": "%s"}' % texture)
+
+
+def test_overlay_texture_becomes_sprite(datapack, capsys):
+    make_overlay(datapack)
+    (datapack / "assets" / "ns" / "textures" / "gui" / "overlay.png.mcmeta").write_text("{}")
+    assert originupdater.start_updating(str(datapack))
+
+    power = (datapack / "data" / "ns" / "powers" / "overlay.json").read_text()
+    assert '"texture": "ns:gui/overlay"' in power
+    old = datapack / "assets" / "ns" / "textures" / "gui" / "overlay.png"
+    new = datapack / "assets" / "ns" / "textures" / "gui" / "sprites" / "gui" / "overlay.png"
+    # Linked, so the old path keeps working
+    assert old.read_bytes() == new.read_bytes()
+    assert os.path.samefile(old, new)
+    assert (new.parent / "overlay.png.mcmeta").is_file()
+    assert "File: " + str(datapack / "data" / "ns" / "powers" / "overlay.json") + ": Linked texture" in capsys.readouterr().out
+
+
+def test_renames_when_links_fail(datapack, monkeypatch):
+    def no_link(source, target):
+        raise OSError("not supported")
+    monkeypatch.setattr(os, "link", no_link)
+    textures = datapack / "assets" / "ns" / "textures"
+    (textures / "overlays").mkdir()
+    os.rename(textures / "gui" / "overlay.png", textures / "overlays" / "overlay.png")
+    make_overlay(datapack, "ns:textures/overlays/overlay.png")
+    assert originupdater.start_updating(str(datapack))
+
+    assert (textures / "gui" / "sprites" / "overlays" / "overlay.png").is_file()
+    assert not (textures / "overlays").exists()
+
+
+def test_missing_texture_only_warns(datapack, capsys):
+    make_overlay(datapack, "ns:textures/gui/missing.png")
+    assert originupdater.start_updating(str(datapack))
+    assert "Texture ns/textures/gui/missing.png not found" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+import pytest
+
+from originpy import particles
+import originupdater
+
+VALID = [
+    ("minecraft:block", "minecraft:oak_log[axis=y, lit=true]", {"block_state": {"Name": "minecraft:oak_log", "Properties": {"axis": "y", "lit": "true"}}}),
+    ("minecraft:block", "minecraft:oak_log[axis=y,lit=true]", {"block_state": {"Name": "minecraft:oak_log", "Properties": {"axis": "y", "lit": "true"}}}),
+    ("block_marker", "barrier", {"block_state": {"Name": "barrier"}}),
+    ("falling_dust", "minecraft:sand[]", {"block_state": {"Name": "minecraft:sand"}}),
+    ("dust_pillar", "minecraft:stone", {"block_state": {"Name": "minecraft:stone"}}),
+    ("minecraft:dust", "1.0 0.5 0 1", {"color": [1.0, 0.5, 0.0], "scale": 1.0}),
+    ("dust", "0.2 .3 0.4 10", {"color": [0.2, 0.3, 0.4], "scale": 10.0}),
+    ("dust_color_transition", "1 0 0 2 0 0 1", {"from_color": [1.0, 0.0, 0.0], "to_color": [0.0, 0.0, 1.0], "scale": 2.0}),
+    ("minecraft:item", "minecraft:apple", {"item": {"id": "minecraft:apple"}}),
+    ("vibration", "1 64 -2.5 20", {"destination": {"type": "block", "pos": [1.0, 64.0, -2.5]}, "arrival_in_ticks": 20.0}),
+    ("Minecraft:Shriek", " 5 ", {"delay": 5.0}),
+    ("sculk_charge", "3.14", {"roll": 3.14}),
+    ("dragon_breath", "1", {"power": 1.0}),
+    ("flame", "anything", None),
+]
+
+MALFORMED = [
+    ("block", ""),
+    ("block", "minecraft:stone[axis]"),
+    ("block", "minecraft:stone[axis=y"),
+    ("block", "Minecraft:Stone"),
+    ("dust", "1 0 0"),
+    ("dust", "red green blue 1"),
+    ("dust", "1 0 0 1 extra"),
+    ("dust_color_transition", "1 0 0 1"),
+    ("item", "minecraft:stick{Damage:1}"),
+    ("item", ""),
+    ("vibration", "1 2 3"),
+    ("shriek", "soon"),
+    ("sculk_charge", ""),
+]
+
+
+@pytest.mark.parametrize("particle_id, params, expected", VALID)
+def test_parse(particle_id, params, expected):
+    assert particles.parse_params(particle_id, params) == expected
+
+
+@pytest.mark.parametrize("particle_id, params", MALFORMED)
+def test_malformed_params_raise(particle_id, params):
+    with pytest.raises(ValueError):
+        particles.parse_params(particle_id, params)
+
+
+def test_cached_result_is_not_shared():
+    first = particles.parse_params("dust", "1 0 0 1")
+    first["color"].append(5)
+    assert particles.parse_params("dust", "1 0 0 1") == {"color": [1.0, 0.0, 0.0], "scale": 1.0}
+
+
+def test_malformed_params_are_logged_and_kept(capsys):
+    particle = {"type": "minecraft:dust", "params": "1 0 0"}
+    originupdater.fix_particle_effect({"file": "power.json", "fields": ".particle"}, particle)
+    assert particle["params"] == "1 0 0"
+    assert "[ERROR]" in capsys.readouterr().out
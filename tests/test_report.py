@@ -0,0 +1,57 @@
+import shutil
+
+import pytest
+
+import originupdater
+
+
+@pytest.fixture
+def run_stats():
+    stats = originupdater.enable_run_stats()
+    yield stats
+    originupdater.run_stats = None
+
+
+def add_bad_power(datapack):
+    (datapack / "data" / "ns" / "powers" / "bad.json").write_text("not json")
+
+
+def test_counts_files_and_rules(datapack, run_stats):
+    add_bad_power(datapack)
+    originupdater.start_updating(str(datapack))
+
+    assert run_stats["files"] == {"read": 2, "written": 2, "skipped": 1, "unchanged": 0, "reused": 0}
+    assert run_stats["skipped_files"][0]["file"].endswith("bad.json")
+    rules = run_stats["categories"]["fix_particle_effect"]["rules"]
+    assert rules == {'INFO: Updated params for "minecraft:dust" particle.': 1}
+    # Only fix functions are categories
+    assert all(category.startswith("fix_") for category in run_stats["categories"])
+
+
+def test_store_hits_count_like_updates(datapack, tmp_path, run_stats):
+    add_bad_power(datapack)
+    folders = []
+    for i in range(2):
+        folder = tmp_path / f"copy{i}"
+        shutil.copytree(datapack, folder)
+        folders.append(str(folder))
+    originupdater.update_datapacks(folders, originupdater.open_store(str(tmp_path / "store")))
+
+    assert run_stats["files"]["reused"] == 3
+    assert run_stats["files"]["skipped"] == 2
+    assert [skipped["file"] for skipped in run_stats["skipped_files"]] == [
+        str(tmp_path / f"copy{i}" / "data" / "ns" / "powers" / "bad.json") for i in range(2)]
+    assert run_stats["levels"]["INFO"] % 2 == 0
+    assert run_stats["categories"]["fix_power"]["rules"]["INFO: Fixing power"] == 2
+    assert run_stats["categories"]["fix_power"]["calls"] == 2
+
+
+def test_counts_renames_without_messages(datapack, run_stats):
+    (datapack / "data" / "ns" / "powers" / "feed.json").write_text(
+        '{"type": "origins:active_self", "entity_action": {"type": "origins:feed", "food": 4, "saturation": 1}}')
+    originupdater.start_updating(str(datapack))
+
+    categories = run_stats["categories"]
+    assert categories["fix_entity_action"]["rules"] == {"INFO: Renamed food to nutrition": 1}
+    assert categories["fix_icon"]["rules"] == {"INFO: Converted icon to an item stack": 1}
+    assert categories["fix_item_stack"]["rules"] == {"INFO: Renamed item to id": 1}
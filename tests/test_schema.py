@@ -0,0 +1,26 @@
+import pytest
+
+from originpy import schema
+
+TABLE_NAMES = [table_name for table_names in schema.DOC_TABLES.values() for table_name in table_names]
+
+
+@pytest.fixture(scope="module")
+def doc_tables():
+    return schema.load_doc_tables()
+
+
+@pytest.mark.parametrize("table_name", TABLE_NAMES)
+def test_specs_match_doc_tables(doc_tables, table_name):
+    table = doc_tables[table_name]
+    specs = getattr(schema, table_name)
+    assert list(specs) == list(table)
+    for type, shape in table.items():
+        expected = [(field["name"], [(bool(typ["is_array"]), typ["type"]) for typ in field["type"]])
+                    for field in shape]
+        actual = [(field.name, [(typ.is_array, typ.type) for typ in field.types]) for field in specs[type]]
+        assert actual == expected, type
+
+
+def test_power_fields_match_doc_table(doc_tables):
+    assert schema.power_fields == set(doc_tables["power"])
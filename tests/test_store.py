@@ -0,0 +1,77 @@
+import os
+import shutil
+import stat
+
+import pytest
+
+import originupdater
+
+
+def update_copies(datapack, tmp_path, store, count=2):
+    folders = []
+    for i in range(count):
+        folder = tmp_path / f"copy{i}"
+        shutil.copytree(datapack, folder)
+        folders.append(str(folder))
+    originupdater.update_datapacks(folders, store)
+    return folders
+
+
+def test_identical_files_are_updated_once(datapack, tmp_path):
+    store = originupdater.open_store(str(tmp_path / "store"))
+    first, second = update_copies(datapack, tmp_path, store)
+
+    assert store["stats"] == {"updated": 2, "reused": 2}
+    power = os.path.join("data", "ns", "powers", "power.json")
+    with open(os.path.join(first, power)) as f, open(os.path.join(second, power)) as g:
+        assert f.read() == g.read()
+
+
+def test_outputs_are_not_hardlinked_by_default(datapack, tmp_path):
+    store = originupdater.open_store(str(tmp_path / "store"))
+    _, second = update_copies(datapack, tmp_path, store)
+
+    output = os.stat(os.path.join(second, "data", "ns", "powers", "power.json"))
+    assert output.st_nlink == 1
+    assert output.st_mode & stat.S_IWUSR
+
+
+def test_hardlinks_when_asked(datapack, tmp_path):
+    store = originupdater.open_store(str(tmp_path / "store"), hardlinks=True)
+    _, second = update_copies(datapack, tmp_path, store)
+
+    # Unless the filesystem supports reflinks, which are preferred
+    output = os.stat(os.path.join(second, "data", "ns", "powers", "power.json"))
+    assert output.st_nlink > 1 or output.st_mode & stat.S_IWUSR
+
+
+def test_changed_store_entry_is_not_reused(datapack, tmp_path):
+    store = originupdater.open_store(str(tmp_path / "store"))
+    update_copies(datapack, tmp_path, store, count=1)
+    for root, _, files in os.walk(store["folder"]):
+        for file in files:
+            if file.endswith(".json"):
+                path = os.path.join(root, file)
+                os.chmod(path, 0o644)
+                with open(path, "w") as f:
+                    f.write("{}")
+
+    folder = tmp_path / "again"
+    shutil.copytree(datapack, folder)
+    originupdater.start_updating(str(folder), store)
+    assert store["stats"] == {"updated": 4, "reused": 0}
+    assert "dust" in (folder / "data" / "ns" / "powers" / "power.json").read_text()
+
+
+def test_failed_update_leaves_nothing_in_store(datapack, tmp_path, capsys):
+    def failing_update(trace, file):
+        print("Started")
+        raise KeyError("type")
+    store = originupdater.open_store(str(tmp_path / "store"))
+    trace = {"store": store, "namespace": "ns", "asset_moves": []}
+    power = str(datapack / "data" / "ns" / "powers" / "power.json")
+    with pytest.raises(KeyError):
+        originupdater.update_file_with_store(trace, power, failing_update)
+
+    assert "Started" in capsys.readouterr().out
+    assert [files for _, _, files in os.walk(store["folder"]) if files] == []
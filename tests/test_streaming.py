@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+
+import originupdater
+
+DOCUMENTS = [
+    '{}',
+    ' \n{ } \n',
+    '{"aa": 12.5}',
+    '{"aa": 1.5e-3, "bb": -0.25E+2, "cc": 100}',
+    '{"loading_priority": 1.5, "hidden": true, "name": null, "flag": false}',
+    '{"k\\"ey": "va\\\\lue \\"quoted\\" \\u00e9\\ud83d\\ude00\\n", "\\u0041": "\\/"}',
+    '{"one": {"type": "origins:invisibility", "list": [1, 2.0, {"x": []}]}, "two": {}}',
+    '{\n    "type": "origins:multiple",\n    "a": {"type": "origins:invisibility"}\n}',
+]
+
+MALFORMED = [
+    '',
+    '[1, 2]',
+    '{"a": 1',
+    '{"a" 1}',
+    '{"a": 1,}',
+    '{1: 2}',
+    '{"a": 1} extra',
+    '{} {}',
+    '{"a": 1.}',
+    '{"a": tru}',
+]
+
+
+def iterate(text, chunk):
+    originupdater.STREAMING_CHUNK = chunk
+    return list(originupdater.iterate_json_object(io.StringIO(text)))
+
+
+@pytest.fixture(autouse=True)
+def restore_chunk():
+    chunk = originupdater.STREAMING_CHUNK
+    yield
+    originupdater.STREAMING_CHUNK = chunk
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_same_as_json_load_for_every_chunk_size(text):
+    expected = list(json.loads(text).items())
+    for chunk in range(1, len(text) + 2):
+        assert iterate(text, chunk) == expected, chunk
+
+
+@pytest.mark.parametrize("text", MALFORMED)
+def test_malformed_input_raises(text):
+    for chunk in range(1, len(text) + 2):
+        with pytest.raises(ValueError):
+            iterate(text, chunk)
+
+
+def test_streaming_update_matches_normal_update(tmp_path):
+    power = {
+        "type": "origins:multiple",
+        "loading_priority": 1.5,
+        "one": {"type": "origins:particle", "particle": {"type": "minecraft:dust", "params": "1 0 0 1"}},
+        "two": {"type": "origins:entity_group", "group": "undead"},
+    }
+    normal = tmp_path / "normal" / "power.json"
+    streamed = tmp_path / "streamed" / "power.json"
+    for path in (normal, streamed):
+        path.parent.mkdir()
+        path.write_text(json.dumps(power))
+
+    originupdater.update_power_file({"namespace": "ns"}, str(normal))
+    originupdater.STREAMING_CHUNK = 7
+    assert originupdater.update_power_file_streaming({"namespace": "ns"}, str(streamed))
+    assert streamed.read_text() == normal.read_text()
+
+
+def test_streaming_leaves_other_powers(tmp_path):
+    path = tmp_path / "power.json"
+    path.write_text('{"type": "origins:invisibility"}')
+    assert not originupdater.update_power_file_streaming({"namespace": "ns"}, str(path))
+
+
+def test_fix_errors_are_raised_like_normal_update(tmp_path):
+    path = tmp_path / "power.json"
+    path.write_text('{"type": "origins:multiple", "a": {"type": "origins:entity_group"}}')
+    with pytest.raises(KeyError):
+        originupdater.update_power_file({"namespace": "ns"}, str(path))
+    with pytest.raises(KeyError):
+        originupdater.update_power_file_streaming({"namespace": "ns"}, str(path))
+    assert [file.name for file in tmp_path.iterdir()] == ["power.json"]
+
+
+def test_streaming_skips_malformed_files(tmp_path, capsys):
+    path = tmp_path / "power.json"
+    path.write_text('{"type": "origins:multiple", "a": {"type": "origins:invisibility"}, "b": tru}')
+    assert originupdater.update_power_file_streaming({"namespace": "ns"}, str(path))
+    assert "Skipping file." in capsys.readouterr().out
+    assert [file.name for file in tmp_path.iterdir()] == ["power.json"]
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import originupdater
+
+
+@pytest.fixture
+def output(datapack, tmp_path):
+    folder = tmp_path / "out"
+    shutil.copytree(datapack, folder)
+    assert originupdater.start_updating(str(folder))
+    return folder
+
+
+def power_path(folder, name="power.json"):
+    return folder / "data" / "ns" / "powers" / name
+
+
+def test_migrated_kind(datapack):
+    source = str(datapack)
+    assert originupdater.get_migrated_kind(source, str(power_path(datapack))) == ("ns", "powers")
+    assert originupdater.get_migrated_kind(source, str(datapack / "data" / "ns" / "origins" / "origin.json")) == ("ns", "origins")
+    # Editor backups, other folders and files too close to the root aren't migrated
+    assert originupdater.get_migrated_kind(source, str(power_path(datapack, "a.json~"))) is None
+    assert originupdater.get_migrated_kind(source, str(datapack / "data" / "ns" / "tags" / "a.json")) is None
+    assert originupdater.get_migrated_kind(source, str(datapack / "data" / "powers" / "a.json")) is None
+    assert originupdater.get_migrated_kind(source, str(datapack / "pack.mcmeta")) is None
+
+
+def test_migrates_added_and_changed_files(datapack, output):
+    power_path(datapack, "added.json").write_text('{"type": "origins:particle", "particle": {"type": "dust", "params": "0 1 0 2"}}')
+    power_path(datapack).write_text('{"type": "origins:particle", "particle": {"type": "shriek", "params": "5"}}')
+    changed = {str(power_path(datapack, "added.json")), str(power_path(datapack))}
+    assert originupdater.migrate_changed_files(str(datapack), str(output), changed) == 2
+
+    added = json.loads(power_path(output, "added.json").read_text())
+    assert added["particle"]["params"] == {"color": [0.0, 1.0, 0.0], "scale": 2.0}
+    power = json.loads(power_path(output).read_text())
+    assert power["particle"]["params"] == {"delay": 5.0}
+
+
+def test_removes_deleted_files(datapack, output):
+    os.remove(power_path(datapack))
+    assert originupdater.migrate_changed_files(str(datapack), str(output), {str(power_path(datapack))}) == 0
+    assert not power_path(output).exists()
+
+
+def test_keeps_last_output_of_malformed_files(datapack, output, capsys):
+    last_output = power_path(output).read_text()
+    power_path(datapack).write_text("{}")
+    power_path(datapack, "new.json").write_text("[]")
+    changed = {str(power_path(datapack)), str(power_path(datapack, "new.json"))}
+    assert originupdater.migrate_changed_files(str(datapack), str(output), changed) == 0
+
+    assert power_path(output).read_text() == last_output
+    assert not power_path(output, "new.json").exists()
+    assert sorted(os.listdir(power_path(output).parent)) == ["power.json"]
+    assert "Couldn't update the file" in capsys.readouterr().out
+
+
+def test_polling_watcher_merges_changes(datapack):
+    wait = originupdater.make_polling_watcher(str(datapack))
+    assert wait(0) == set()
+    for name in ("a.json", "b.json", "c.json"):
+        power_path(datapack, name).write_text("{}")
+    os.remove(power_path(datapack))
+
+    changed = wait(0)
+    assert changed == {str(power_path(datapack, name)) for name in ("a.json", "b.json", "c.json", "power.json")}
+    assert wait(0) == set()
@@ -0,0 +1,46 @@
+import zipfile
+
+import originupdater
+
+
+def test_zip_round_trip(datapack, tmp_path):
+    zip_path = tmp_path / "pack.zip"
+    assert originupdater.zip_datapack(str(datapack), str(zip_path), threads=2)
+
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        assert zip_ref.testzip() is None
+        infos = zip_ref.infolist()
+        names = [info.filename for info in infos]
+        assert names == sorted(names)
+        for info in infos:
+            assert info.date_time == (1980, 1, 1, 0, 0, 0)
+            assert zip_ref.read(info) == (datapack / info.filename).read_bytes()
+        methods = {info.filename: info.compress_type for info in infos}
+    assert methods["assets/ns/textures/gui/overlay.png"] == zipfile.ZIP_STORED
+    assert methods["data/ns/powers/power.json"] == zipfile.ZIP_DEFLATED
+
+
+def test_zip_is_reproducible(datapack, tmp_path):
+    first = tmp_path / "first.zip"
+    second = tmp_path / "second.zip"
+    assert originupdater.zip_datapack(str(datapack), str(first), threads=1)
+    (datapack / "pack.mcmeta").touch()
+    assert originupdater.zip_datapack(str(datapack), str(second), threads=4)
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_zip_level_zero_stores_everything(datapack, tmp_path):
+    zip_path = tmp_path / "pack.zip"
+    assert originupdater.zip_datapack(str(datapack), str(zip_path), level=0)
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in zip_ref.infolist())
+
+
+def test_zip_too_big_leaves_nothing(datapack, tmp_path, monkeypatch):
+    def huge_entry(file_path, level):
+        return zipfile.ZIP_STORED, 0, 0x100000000, b""
+    monkeypatch.setattr(originupdater, "compress_zip_entry", huge_entry)
+
+    zip_path = tmp_path / "pack.zip"
+    assert not originupdater.zip_datapack(str(datapack), str(zip_path))
+    assert list(tmp_path.iterdir()) == [datapack]